@@ -1,15 +1,42 @@
 #!/usr/bin/env python
 
+import functools
+import http.client
 import json
 import os
 import platform
 import re
 import shutil
+import stat
 import subprocess
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 
-from mcp.server.fastmcp import Context, FastMCP
+from mcp.server.fastmcp import FastMCP
+
+try:
+    import orjson
+except ImportError:  # optional, see the "speedups" extra
+    orjson = None
+
+if orjson is not None:
+    def _json_loads(data: bytes) -> Any:
+        return orjson.loads(data)
+
+    def _json_dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+else:
+    def _json_loads(data: bytes) -> Any:
+        return json.loads(data)
+
+    def _json_dumps(obj: Any) -> bytes:
+        # ensure_ascii=False matches orjson's output byte for byte
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
 
 # Create MCP server
 mcp = FastMCP(
@@ -18,54 +45,156 @@ mcp = FastMCP(
     description="A Python MCP server to install other MCP servers",
 )
 
-def get_claude_desktop_config_path() -> Optional[str]:
-    """Get the path to the Claude Desktop configuration file."""
-    home = os.path.expanduser("~")
+def _home_dir() -> Optional[Path]:
+    """Return the user's home directory, or None if it cannot be determined."""
+    try:
+        return Path.home()
+    except RuntimeError:
+        return None
+
+def _compute_claude_config_path() -> Optional[Path]:
+    """Work out the Claude Desktop configuration file path for this platform."""
+    system = platform.system()
     
-    if platform.system() == "Windows":
-        return os.path.join(os.environ.get("APPDATA", ""), "Claude", "claude_desktop_config.json")
-    elif platform.system() == "Darwin":  # macOS
-        return os.path.join(home, "Library", "Application Support", "Claude", "claude_desktop_config.json")
+    if system == "Windows":
+        return Path(os.environ.get("APPDATA", "")) / "Claude" / "claude_desktop_config.json"
+    
+    # Without a home directory there is nowhere to look; report that when a
+    # tool needs the config rather than failing server startup
+    home = _home_dir()
+    if home is None:
+        return None
+    
+    if system == "Darwin":  # macOS
+        return home / "Library" / "Application Support" / "Claude" / "claude_desktop_config.json"
     else:  # Linux and others
-        return os.path.join(home, ".config", "Claude", "claude_desktop_config.json")
+        return home / ".config" / "Claude" / "claude_desktop_config.json"
+
+# The platform cannot change while the server is running
+_CLAUDE_CONFIG_PATH: Optional[Path] = _compute_claude_config_path()
+
+def get_claude_desktop_config_path() -> Path:
+    """Get the path to the Claude Desktop configuration file."""
+    if _CLAUDE_CONFIG_PATH is None:
+        raise ValueError("Could not find Claude Desktop config file")
+    return _CLAUDE_CONFIG_PATH
+
+def _stat_key(st: os.stat_result) -> Tuple[int, int, int, int]:
+    """
+    Identify a version of a file from its stat result.
+    
+    The mtime alone is not enough: some filesystems (HFS+, FAT/exFAT, some
+    network mounts) store it in whole seconds, and tools can preserve it. The
+    size, ctime and inode catch edits within the same second, and the inode
+    changes whenever a writer (such as Claude Desktop) swaps in a new file.
+    """
+    return (st.st_mtime_ns, st.st_ctime_ns, st.st_size, st.st_ino)
+
+# Raw bytes of the last read or written config, keyed by _stat_key so external
+# edits are picked up: (stat key, raw bytes). Parsing the bytes again is
+# cheaper than deep-copying a parsed dict and always yields a fresh copy.
+_CONFIG_CACHE: Optional[Tuple[Tuple[int, int, int, int], bytes]] = None
+
+def _read_config_bytes(config_path: Path) -> Optional[bytes]:
+    """Return the raw contents of the config file, or None if it is missing."""
+    global _CONFIG_CACHE
+    
+    try:
+        key = _stat_key(config_path.stat())
+    except FileNotFoundError:
+        return None
+    
+    if _CONFIG_CACHE is not None and _CONFIG_CACHE[0] == key:
+        return _CONFIG_CACHE[1]
+    
+    data = config_path.read_bytes()
+    _CONFIG_CACHE = (key, data)
+    return data
 
 def read_config() -> Dict:
     """Read the Claude Desktop configuration file."""
-    config_path = get_claude_desktop_config_path()
-    if not config_path or not os.path.exists(config_path):
+    data = _read_config_bytes(get_claude_desktop_config_path())
+    if data is None:
         return {}
     
     try:
-        with open(config_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return _json_loads(data)
     except json.JSONDecodeError:
         return {}
 
+def _atomic_write_bytes(path: Path, data: bytes, fsync: bool = True) -> None:
+    """
+    Write data to a temporary file next to path, fsync it and swap it in, so
+    a crash never leaves a partially written file behind. Pass fsync=False
+    for files whose loss after a crash is harmless.
+    
+    Symlinks are followed so the link target is updated rather than replaced,
+    and an existing file keeps its permission bits. A new file keeps the 0600
+    mode of the temporary file, since the config can hold env secrets.
+    """
+    path = path.resolve()
+    try:
+        mode = stat.S_IMODE(path.stat().st_mode)
+    except FileNotFoundError:
+        mode = None
+    
+    tmp = tempfile.NamedTemporaryFile(
+        dir=path.parent,
+        prefix=f".{path.name}.",
+        suffix=".tmp",
+        delete=False,
+    )
+    try:
+        with tmp:
+            tmp.write(data)
+            if fsync:
+                tmp.flush()
+                os.fsync(tmp.fileno())
+        if mode is not None:
+            os.chmod(tmp.name, mode)
+        os.replace(tmp.name, path)
+    except BaseException:
+        if os.path.exists(tmp.name):
+            os.unlink(tmp.name)
+        raise
+
+# Set once the config directory is known to exist
+_CONFIG_DIR_READY = False
+
 def write_config(config: Dict) -> None:
     """Write to the Claude Desktop configuration file."""
+    global _CONFIG_CACHE, _CONFIG_DIR_READY
+    
     config_path = get_claude_desktop_config_path()
-    if not config_path:
-        raise ValueError("Could not find Claude Desktop config file")
-        
-    config_dir = os.path.dirname(config_path)
-    os.makedirs(config_dir, exist_ok=True)
+    data = _json_dumps(config)
+    
+    # Skip the write entirely if nothing changed
+    if _read_config_bytes(config_path) == data:
+        return
+    
+    if not _CONFIG_DIR_READY:
+        config_path.parent.mkdir(parents=True, exist_ok=True)
+        _CONFIG_DIR_READY = True
+    
+    _atomic_write_bytes(config_path, data)
     
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f, indent=2)
+    _CONFIG_CACHE = (_stat_key(config_path.stat()), data)
 
 def parse_env_vars(env_vars: Optional[List[str]]) -> Optional[Dict[str, str]]:
     """Parse environment variables from a list of KEY=VALUE strings."""
     if not env_vars:
         return None
         
-    env_obj = {}
-    for env_var in env_vars:
-        if "=" in env_var:
-            key, value = env_var.split("=", 1)
-            env_obj[key] = value
+    # Entries without a "=" are ignored
+    env_obj = {
+        key: value
+        for key, sep, value in (env_var.partition("=") for env_var in env_vars)
+        if sep
+    }
             
-    return env_obj if env_obj else None
+    return env_obj or None
 
+@functools.lru_cache(maxsize=None)
 def check_command_exists(command: str) -> bool:
     """Check if a command exists in the system PATH."""
     return shutil.which(command) is not None
@@ -86,22 +215,139 @@ def run_command(
             cwd=cwd,
             env=env_dict,
             capture_output=True,
-            text=True,
             check=False,
         )
-        return result.returncode == 0, result.stdout + result.stderr
+        # Decode once at the end instead of through the locale codec
+        return result.returncode == 0, (result.stdout + result.stderr).decode("utf-8", "replace")
     except Exception as e:
         return False, str(e)
 
+_PYPI_PACKAGE_URL = "https://pypi.org/pypi/{name}/json"
+_NPM_PACKAGE_URL = "https://registry.npmjs.org/{name}"
+
+# Packages found to be missing are remembered for this many seconds, so
+# repeated lookups of a mistyped name do not hit the registry again
+_NEGATIVE_CACHE_TTL = 900
+
+# Registry URL -> time.monotonic() of the last 404
+_NEG_CACHE: Dict[str, float] = {}
+
+@functools.lru_cache(maxsize=512)
+def _registry_url_exists(url: str) -> bool:
+    """
+    Check if a package registry URL exists using a HEAD request.
+    
+    Only 200 responses are cached; anything else, including network
+    failures, raises so that lru_cache does not remember it.
+    """
+    request = urllib.request.Request(url, method="HEAD")
+    with urllib.request.urlopen(request, timeout=10) as response:
+        if response.status != 200:
+            raise urllib.error.HTTPError(
+                url, response.status, response.reason, response.headers, None
+            )
+        return True
+
+def _package_exists(url: str) -> bool:
+    """Check if a package exists at the given registry URL."""
+    missed_at = _NEG_CACHE.get(url)
+    if missed_at is not None:
+        if time.monotonic() - missed_at < _NEGATIVE_CACHE_TTL:
+            return False
+        del _NEG_CACHE[url]
+    
+    try:
+        return _registry_url_exists(url)
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            _NEG_CACHE[url] = time.monotonic()
+        return False
+    except (urllib.error.URLError, http.client.HTTPException, OSError):
+        return False
+
 def is_pypi_package(package_name: str) -> bool:
     """Check if a package exists on PyPI."""
-    success, _ = run_command(["pip", "search", package_name])
-    return success
+    return _package_exists(
+        _PYPI_PACKAGE_URL.format(name=urllib.parse.quote(package_name))
+    )
 
 def is_npm_package(package_name: str) -> bool:
     """Check if a package exists on npm."""
-    success, _ = run_command(["npm", "view", package_name])
-    return success
+    # Scoped packages are addressed as @scope%2Fpackage
+    return _package_exists(
+        _NPM_PACKAGE_URL.format(name=urllib.parse.quote(package_name, safe="@"))
+    )
+
+def _compute_package_main_cache_path() -> Optional[Path]:
+    """Work out where to persist the package.json main cache, if anywhere."""
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    if cache_home:
+        return Path(cache_home) / "mcp-builder" / "pkgjson.json"
+    
+    home = _home_dir()
+    if home is None:
+        return None
+    return home / ".cache" / "mcp-builder" / "pkgjson.json"
+
+# None if there is no home directory, in which case the cache is memory only
+_PACKAGE_MAIN_CACHE_PATH: Optional[Path] = _compute_package_main_cache_path()
+
+# Absolute package.json path -> [*_stat_key, main], loaded on first use and
+# persisted to _PACKAGE_MAIN_CACHE_PATH. A hit costs a single stat. The mtime
+# alone is not a safe key, since npm tarballs, tar, cp -p and rsync -a preserve
+# or fix it, but none of them can preserve the ctime. Once more than
+# _PACKAGE_MAIN_CACHE_SIZE entries are stored, the oldest inserted are dropped.
+_PACKAGE_MAIN_CACHE: Optional[Dict[str, List]] = None
+_PACKAGE_MAIN_CACHE_SIZE = 256
+
+def _load_package_main_cache() -> Dict[str, List]:
+    """Load the on-disk package.json main cache, once per process."""
+    global _PACKAGE_MAIN_CACHE
+    
+    if _PACKAGE_MAIN_CACHE is None:
+        cache = {}
+        if _PACKAGE_MAIN_CACHE_PATH is not None:
+            try:
+                cache = _json_loads(_PACKAGE_MAIN_CACHE_PATH.read_bytes())
+            except (OSError, ValueError):
+                pass
+        _PACKAGE_MAIN_CACHE = cache if isinstance(cache, dict) else {}
+    return _PACKAGE_MAIN_CACHE
+
+def read_package_main(package_json_path: Path) -> str:
+    """Read the main entry point from a package.json, defaulting to index.js."""
+    key = os.path.abspath(package_json_path)
+    stat_key = list(_stat_key(os.stat(key)))
+    
+    cache = _load_package_main_cache()
+    entry = cache.get(key)
+    if isinstance(entry, list) and len(entry) == 5 and entry[:4] == stat_key:
+        return entry[4]
+    
+    main_file = _parse_package_main(Path(key).read_bytes())
+    
+    cache.pop(key, None)
+    cache[key] = stat_key + [main_file]
+    while len(cache) > _PACKAGE_MAIN_CACHE_SIZE:
+        del cache[next(iter(cache))]
+    
+    if _PACKAGE_MAIN_CACHE_PATH is not None:
+        try:
+            _PACKAGE_MAIN_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            # A lost cache is harmless, so skip the fsync
+            _atomic_write_bytes(_PACKAGE_MAIN_CACHE_PATH, _json_dumps(cache), fsync=False)
+        except OSError:
+            # The cache is only an optimization
+            pass
+    
+    return main_file
+
+def _parse_package_main(data: bytes) -> str:
+    """Parse the main entry point out of the contents of a package.json."""
+    return _json_loads(data).get("main", "index.js")
+
+# Characters not allowed in a Claude Desktop server name
+_INVALID_NAME_RE = re.compile(r'[^a-zA-Z0-9_-]')
 
 def install_to_claude_desktop(
     server_name: str,
@@ -128,20 +374,10 @@ def install_to_claude_desktop(
             server_name = server_name.split("/")[1]
     
     # Remove any invalid characters from server name
-    server_name = re.sub(r'[^a-zA-Z0-9_-]', '-', server_name)
+    server_name = _INVALID_NAME_RE.sub('-', server_name)
     
-    # Get the Claude Desktop config file path
-    config_path = get_claude_desktop_config_path()
-    
-    if not config_path:
-        raise ValueError("Could not find Claude Desktop config file")
-        
     # Read the existing config
-    try:
-        with open(config_path, "r", encoding="utf-8") as f:
-            config = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        config = {}
+    config = read_config()
         
     # Initialize mcpServers if it doesn't exist
     if "mcpServers" not in config:
@@ -161,12 +397,78 @@ def install_to_claude_desktop(
     if cwd:
         server_config["cwd"] = cwd
         
+    # Nothing to do if the server is already installed with this config
+    if config["mcpServers"].get(server_name) == server_config:
+        return
+        
     # Add the server to the config
     config["mcpServers"][server_name] = server_config
     
     # Write the config back to the file
-    with open(config_path, "w", encoding="utf-8") as f:
-        json.dump(config, f, indent=2)
+    write_config(config)
+
+class _PackageName(NamedTuple):
+    """A package name, scanned once for the characters the installers test."""
+    name: str
+    starts_with_at: bool
+    has_slash: bool
+    has_dot: bool
+
+    @classmethod
+    def parse(cls, name: str) -> "_PackageName":
+        return cls(name, name.startswith("@"), "/" in name, "." in name)
+
+class _RepoInstaller(NamedTuple):
+    """One way install_repo_mcp_server can install a package."""
+    requires: Tuple[str, ...]
+    matches: Callable[[_PackageName], bool]
+    command: str
+    leading_args: Tuple[str, ...]
+    label: str
+    server_name: Callable[[_PackageName], str]
+
+# How install_repo_mcp_server handles a package name; the first installer
+# whose commands are available and that matches the name wins
+_REPO_INSTALLERS = (
+    # Likely npm packages (start with @ or don't have dots); for
+    # @scope/package, use just "package" as the server name
+    _RepoInstaller(
+        requires=("npm", "npx"),
+        matches=lambda pkg: pkg.starts_with_at or not pkg.has_dot,
+        command="npx",
+        leading_args=(),
+        label="npx",
+        server_name=lambda pkg: (
+            pkg.name.split("/")[1] if pkg.starts_with_at and pkg.has_slash else pkg.name
+        ),
+    ),
+    # Likely Python packages (have dots in the name)
+    _RepoInstaller(
+        requires=("pip", "python"),
+        matches=lambda pkg: pkg.has_dot,
+        command="python",
+        leading_args=("-m",),
+        label="Python",
+        server_name=lambda pkg: pkg.name,
+    ),
+    # If we can't determine the type, try npm first if available, then Python
+    _RepoInstaller(
+        requires=("npm", "npx"),
+        matches=lambda pkg: True,
+        command="npx",
+        leading_args=(),
+        label="npx",
+        server_name=lambda pkg: pkg.name.split("/")[-1] if pkg.has_slash else pkg.name,
+    ),
+    _RepoInstaller(
+        requires=("pip", "python"),
+        matches=lambda pkg: True,
+        command="python",
+        leading_args=("-m",),
+        label="Python",
+        server_name=lambda pkg: pkg.name.split(".")[-1] if pkg.has_dot else pkg.name,
+    ),
+)
 
 @mcp.tool()
 def install_repo_mcp_server(
@@ -185,80 +487,29 @@ def install_repo_mcp_server(
     if args is None:
         args = []
         
-    # Check if Node.js is installed (for npm packages)
-    has_node = check_command_exists("node")
-    has_npm = check_command_exists("npm")
-    has_npx = check_command_exists("npx")
-    has_pip = check_command_exists("pip")
-    has_python = check_command_exists("python")
-    
-    if not has_node and not has_python:
+    if not check_command_exists("node") and not check_command_exists("python"):
         return "Neither Node.js nor Python is installed. Please install one of them."
     
-    # Determine if this is likely an npm package (starts with @ or doesn't have dots)
-    is_likely_npm_package = name.startswith('@') or '.' not in name
+    # Scan the name once; the install table below works off these flags
+    package = _PackageName.parse(name)
     
-    # Handle npm packages
-    if has_npm and has_npx and is_likely_npm_package:
-        # Extract server name from package name (handle scoped packages)
-        if name.startswith("@") and "/" in name:
-            # For @scope/package, use just "package" as the server name
-            server_name = name.split("/")[1]
-        else:
-            server_name = name
+    for installer in _REPO_INSTALLERS:
+        if not all(check_command_exists(c) for c in installer.requires):
+            continue
+        if not installer.matches(package):
+            continue
             
-        # Install to Claude Desktop using npx directly
-        install_to_claude_desktop(
-            server_name,
-            "npx",
-            [name] + args,
-            env,
-        )
-        
-        return f"Successfully installed MCP server '{server_name}' via npx! Please tell the user to restart the application."
-        
-    # Handle Python packages (likely has dots in the name)
-    if has_pip and has_python and '.' in name:
-        # For Python packages, use the package name directly
-        server_name = name
+        server_name = installer.server_name(package)
         
         # Install to Claude Desktop
         install_to_claude_desktop(
             server_name,
-            "python",
-            ["-m", name] + args,
-            env,
-        )
-        
-        return f"Successfully installed MCP server '{server_name}' via Python! Please tell the user to restart the application."
-    
-    # If we can't determine the type, try npm first if available, then Python
-    if has_npm and has_npx:
-        # Use the last part of the name as the server name
-        if "/" in name:
-            server_name = name.split("/")[-1]
-        else:
-            server_name = name
-            
-        install_to_claude_desktop(
-            server_name,
-            "npx",
-            [name] + args,
-            env,
-        )
-        
-        return f"Successfully installed MCP server '{server_name}' via npx! Please tell the user to restart the application."
-    elif has_pip and has_python:
-        server_name = name.split(".")[-1] if "." in name else name
-        
-        install_to_claude_desktop(
-            server_name,
-            "python",
-            ["-m", name] + args,
+            installer.command,
+            list(installer.leading_args) + [name] + args,
             env,
         )
         
-        return f"Successfully installed MCP server '{server_name}' via Python! Please tell the user to restart the application."
+        return f"Successfully installed MCP server '{server_name}' via {installer.label}! Please tell the user to restart the application."
         
     return f"Could not determine how to install '{name}'"
 
@@ -279,16 +530,33 @@ def install_local_mcp_server(
     if args is None:
         args = []
         
-    if not os.path.exists(path):
+    # Path("") means the current directory, which is never what was asked for
+    if not path:
         return f"Path '{path}' does not exist."
         
+    project_dir = Path(path)
+    
+    # List the directory once and answer all the probes below from it
+    try:
+        with os.scandir(project_dir) as it:
+            entries = {entry.name: entry for entry in it}
+    except FileNotFoundError:
+        return f"Path '{path}' does not exist."
+    except NotADirectoryError:
+        entries = {}
+    except OSError as e:
+        return f"Could not read directory '{path}': {e.strerror or e}"
+        
     # Check if it's a Node.js or Python project
-    has_package_json = os.path.exists(os.path.join(path, "package.json"))
-    has_pyproject_toml = os.path.exists(os.path.join(path, "pyproject.toml"))
-    has_setup_py = os.path.exists(os.path.join(path, "setup.py"))
+    package_json_path = project_dir / "package.json"
+    has_package_json = "package.json" in entries
+    has_pyproject_toml = "pyproject.toml" in entries
+    has_setup_py = "setup.py" in entries
     
     # Determine server name from directory name
-    server_name = os.path.basename(path)
+    server_name = project_dir.name
+    if not server_name:
+        return f"Could not determine a server name from '{path}'. Please pass the path to the project directory itself."
     
     # Check if Node.js is installed (for npm packages)
     has_node = check_command_exists("node")
@@ -301,17 +569,14 @@ def install_local_mcp_server(
         # For Node.js projects, use node directly to run the local script
         # Find the main entry point from package.json
         try:
-            with open(os.path.join(path, "package.json"), "r") as f:
-                package_json = json.load(f)
-                
             # Try to find the main entry point
-            main_file = package_json.get("main", "index.js")
+            main_file = read_package_main(package_json_path)
             
             # Install to Claude Desktop
             install_to_claude_desktop(
                 server_name,
                 "node",
-                [os.path.join(path, main_file)] + args,
+                [str(project_dir / main_file)] + args,
                 env,
             )
             
@@ -326,7 +591,8 @@ def install_local_mcp_server(
         module_name = server_name.replace("-", "_")
         
         # Check if there's a directory with the same name
-        if os.path.isdir(os.path.join(path, module_name)):
+        module_entry = entries.get(module_name)
+        if module_entry is not None and module_entry.is_dir():
             # Install to Claude Desktop
             install_to_claude_desktop(
                 server_name,
@@ -339,16 +605,17 @@ def install_local_mcp_server(
             return f"Successfully installed local Python MCP server '{server_name}'! Please tell the user to restart the application."
         else:
             # Try to find any Python files in the root directory
-            py_files = [f for f in os.listdir(path) if f.endswith(".py") and f != "setup.py"]
+            py_files = [
+                name for name in entries
+                if name.endswith(".py") and name != "setup.py"
+            ]
             
             if py_files:
-                main_file = py_files[0].replace(".py", "")
-                
                 # Install to Claude Desktop
                 install_to_claude_desktop(
                     server_name,
                     "python",
-                    [os.path.join(path, main_file + ".py")] + args,
+                    [str(project_dir / py_files[0])] + args,
                     env,
                 )
                 